@@ -3,91 +3,278 @@
 """
 Scraper générique pour une colonne d'URLs dans un fichier Excel.
 - Lit l'Excel fourni
-- Visite chaque lien (en respectant robots.txt)
+- Visite chaque lien (en respectant robots.txt), plusieurs requêtes en parallèle
 - Extrait quelques champs génériques
 - Écrit un CSV (1 ligne par lien)
 Reprise possible : si un CSV de sortie existe déjà, les URLs déjà traitées sont sautées.
 """
 
+import os
 import sys
 import time
 import csv
-import re
+import gzip
+import zlib
+import hashlib
 import argparse
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from operator import itemgetter
 from pathlib import Path
 from urllib.parse import urlparse
 from urllib import robotparser
 
 import requests
+from requests.adapters import HTTPAdapter
 from requests.exceptions import RequestException, Timeout
-from bs4 import BeautifulSoup
+from urllib3.util.retry import Retry
+from selectolax.lexbor import LexborHTMLParser
 import pandas as pd
 
 DEFAULT_INFILE = "liens dossier formation.xlsx"
 DEFAULT_SHEET = 0  # index ou nom de feuille
 DEFAULT_URL_COL = "Lien de la formation sur la plateforme Parcoursup"
 DEFAULT_OUTFILE = "sortie_scraping.csv"
-DEFAULT_DELAY = 1.0  # secondes entre requêtes
+DEFAULT_DELAY = 1.0  # secondes entre requêtes (par hôte)
+DEFAULT_WORKERS = 16  # requêtes simultanées
+WRITE_BATCH = 100  # lignes CSV écrites d'un coup
+WRITE_BUFFER = 1 << 20  # tampon du fichier de sortie (octets)
+MAX_BYTES = 2_000_000  # taille max lue par page HTML
+# Contenus non affichés, exclus du texte visible (comme get_text de bs4, qui garde <noscript>)
+NON_TEXT_TAGS = frozenset(["script", "style", "template"])
+DEFAULT_CACHE_DIR = "cache_html"  # pages HTML déjà téléchargées (partagé avec scrape_parcoursup_structured.py)
+DEFAULT_CACHE_TTL = 86400  # secondes
 
 UA = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0 Safari/537.36"
 
-def detect_lang(soup):
+# Schémas courants de date de publication, par ordre de préférence
+PUB_DATE_SELECTORS = (
+    'meta[property="article:published_time"]',
+    'meta[name="article:published_time"]',
+    'meta[property="og:pubdate"]',
+    'meta[name="pubdate"]',
+    'meta[name="publish_date"]',
+    'meta[itemprop="datePublished"]',
+    'time[itemprop="datePublished"]',
+    "time[datetime]",
+)
+
+def detect_lang(tree):
     # langue depuis <html lang="..">
-    html = soup.find("html")
-    if html and html.get("lang"):
-        return html.get("lang")
+    html = tree.css_first("html")
+    if html and html.attributes.get("lang"):
+        return html.attributes["lang"]
     # sinon via meta
-    meta_lang = soup.find("meta", attrs={"http-equiv": re.compile("^content-language$", re.I)})
-    if meta_lang and meta_lang.get("content"):
-        return meta_lang["content"]
+    meta_lang = tree.css_first('meta[http-equiv="content-language" i]')
+    if meta_lang and meta_lang.attributes.get("content"):
+        return meta_lang.attributes["content"]
     return ""
 
-def extract_pub_date(soup):
-    # Essaye plusieurs schémas courants
+def extract_pub_date(tree):
     candidates = []
-    selectors = [
-        ("meta", {"property": "article:published_time"}),
-        ("meta", {"name": "article:published_time"}),
-        ("meta", {"property": "og:pubdate"}),
-        ("meta", {"name": "pubdate"}),
-        ("meta", {"name": "publish_date"}),
-        ("meta", {"itemprop": "datePublished"}),
-        ("time", {"itemprop": "datePublished"}),
-        ("time", {"datetime": True}),
-    ]
-    for tag, attrs in selectors:
-        el = soup.find(tag, attrs=attrs)
+    for sel in PUB_DATE_SELECTORS:
+        el = tree.css_first(sel)
         if el:
-            val = el.get("content") or el.get("datetime") or el.text
+            val = el.attributes.get("content") or el.attributes.get("datetime") or el.text()
             if val and len(val.strip()) >= 6:
                 candidates.append(val.strip())
     return candidates[0] if candidates else ""
 
-def extract_canonical(soup):
-    link = soup.find("link", rel=lambda x: x and "canonical" in x.lower())
-    return link.get("href") if link and link.get("href") else ""
+def extract_canonical(tree):
+    link = tree.css_first('link[rel~="canonical" i]')
+    return (link.attributes.get("href") or "") if link else ""
 
-def is_allowed_by_robots(url, session, robots_cache):
+def decode_html(body: bytes) -> str:
+    # lexbor suppose de l'UTF-8 ; repli cp1252 pour les rares pages en latin
+    try:
+        return body.decode("utf-8")
+    except UnicodeDecodeError:
+        return body.decode("cp1252", errors="replace")
+
+def text_length(tree):
+    # Longueur du texte visible (morceaux non vides joints par un espace),
+    # calculée sans construire la chaîne complète
+    total = count = 0
+    for node in tree.root.traverse(include_text=True):
+        if node.tag == "-text" and node.parent.tag not in NON_TEXT_TAGS:
+            n = len(node.text_content.strip())
+            if n:
+                total += n
+                count += 1
+    return total + count - 1 if count else 0
+
+def get_robots(url, session, robots_cache):
     parsed = urlparse(url)
     robots_url = f"{parsed.scheme}://{parsed.netloc}/robots.txt"
     if robots_url in robots_cache:
-        rp = robots_cache[robots_url]
-    else:
-        rp = robotparser.RobotFileParser()
-        try:
-            resp = session.get(robots_url, timeout=10)
-            if resp.status_code >= 400:
-                # pas de robots.txt ou inaccessible => on suppose autorisé
-                rp.parse("")
-            else:
-                rp.parse(resp.text.splitlines())
-        except RequestException:
+        return robots_cache[robots_url]
+    rp = robotparser.RobotFileParser()
+    try:
+        resp = session.get(robots_url, timeout=10)
+        if resp.status_code >= 400:
+            # pas de robots.txt ou inaccessible => on suppose autorisé
             rp.parse("")
-        robots_cache[robots_url] = rp
-    return rp.can_fetch(UA, url)
+        else:
+            rp.parse(resp.text.splitlines())
+    except RequestException:
+        rp.parse("")
+    robots_cache[robots_url] = rp
+    return rp
+
+def is_allowed_by_robots(url, session, robots_cache, decision_cache):
+    # Décision mémorisée par hôte + 2 premiers segments du chemin : les fiches
+    # Parcoursup partagent toutes /Web/rechercheFormation/...
+    parsed = urlparse(url)
+    key = (parsed.netloc, "/".join(parsed.path.split("/")[:3]))
+    if key not in decision_cache:
+        decision_cache[key] = get_robots(url, session, robots_cache).can_fetch(UA, url)
+    return decision_cache[key]
+
+def host_delay(url, session, robots_cache, delay):
+    # Respecte un éventuel Crawl-delay du robots.txt s'il est plus long que --delay
+    crawl_delay = get_robots(url, session, robots_cache).crawl_delay(UA)
+    return max(delay, float(crawl_delay or 0))
+
+def cache_path(cache_dir, url):
+    h = hashlib.sha1(url.encode("utf-8")).hexdigest()
+    return cache_dir / h[:2] / f"{h[2:]}.html.gz"
+
+def cache_load(cache_dir, url, ttl):
+    """
+    Page HTML en cache disque : retourne (final_url, corps) si présente et
+    plus récente que `ttl` secondes, sinon None.
+    """
+    path = cache_path(cache_dir, url)
+    try:
+        if time.time() - path.stat().st_mtime > ttl:
+            return None
+        with gzip.open(path, "rb") as fh:
+            final_url, _, body = fh.read().partition(b"\n")
+        final_url = final_url.decode("utf-8")
+    except (OSError, EOFError, zlib.error, UnicodeDecodeError):
+        # Entrée illisible ou corrompue : traitée comme absente, puis réécrite
+        return None
+    return final_url, body
+
+def cache_store(cache_dir, url, final_url, body):
+    # Fichier gzip : URL finale sur la première ligne, puis le corps HTML
+    # Un échec d'écriture (disque plein, droits...) ne fait que sauter la mise en cache
+    path = cache_path(cache_dir, url)
+    tmp = path.parent / f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with gzip.open(tmp, "wb") as fh:
+            fh.write(final_url.encode("utf-8") + b"\n" + body)
+        os.replace(tmp, path)
+    except OSError:
+        try:
+            tmp.unlink(missing_ok=True)
+        except OSError:
+            pass
+
+def read_url_column(in_path, sheet, url_col):
+    # Ne lit que la colonne des URLs ; moteur calamine (Rust) si disponible, sinon openpyxl
+    try:
+        return pd.read_excel(in_path, sheet_name=sheet, usecols=lambda c: c == url_col, engine="calamine")
+    except (ImportError, ValueError):
+        # python-calamine absent ou pandas < 2.2
+        return pd.read_excel(in_path, sheet_name=sheet, usecols=lambda c: c == url_col, engine="openpyxl")
+
+def wait_for_host(netloc, delay, host_locks, next_ok):
+    """
+    Politesse par hôte : attend le créneau réservé pour `netloc` (sans attendre
+    si l'hôte n'a pas été sollicité depuis `delay` secondes) puis réserve le suivant.
+    """
+    with host_locks[netloc]:
+        wait = next_ok[netloc] - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+        next_ok[netloc] = time.monotonic() + delay
+
+def scrape_url(url, session, robots_cache, decision_cache, host_locks, next_ok, delay, check_robots=True,
+               cache_dir=None, cache_ttl=DEFAULT_CACHE_TTL):
+    row = {
+        "source_url": url,
+        "final_url": "",
+        "status_code": "",
+        "title": "",
+        "meta_description": "",
+        "h1": "",
+        "lang": "",
+        "canonical": "",
+        "pub_date": "",
+        "text_length": "",
+        "error": "",
+    }
+
+    try:
+        if check_robots and not is_allowed_by_robots(url, session, robots_cache, decision_cache):
+            row["error"] = "Bloqué par robots.txt"
+            return row
+
+        body = None
+        cached = cache_load(cache_dir, url, cache_ttl) if cache_dir else None
+        if cached:
+            # Déjà en cache : aucune requête, donc pas de délai de politesse
+            row["status_code"] = 200
+            row["final_url"], body = cached
+        else:
+            wait_for_host(urlparse(url).netloc, delay, host_locks, next_ok)
+
+            # stream=True : seuls les en-têtes sont lus tant que le corps n'est pas demandé
+            with session.get(url, stream=True, timeout=20, allow_redirects=True) as resp:
+                row["status_code"] = resp.status_code
+                row["final_url"] = resp.url
+
+                content_type = resp.headers.get("Content-Type", "")
+                if resp.status_code >= 400:
+                    row["error"] = f"HTTP {resp.status_code}"
+                elif "text/html" not in content_type.lower():
+                    row["error"] = f"Type non-HTML: {content_type}"
+                else:
+                    body = resp.raw.read(MAX_BYTES, decode_content=True)
+                    if cache_dir:
+                        cache_store(cache_dir, url, resp.url, body)
+
+        if body is not None:
+            tree = LexborHTMLParser(decode_html(body))
+
+            # Titre
+            title = tree.css_first("title")
+            if title:
+                row["title"] = title.text(strip=True)
+
+            # Meta description
+            md = tree.css_first('meta[name="description" i]')
+            if md and md.attributes.get("content"):
+                row["meta_description"] = md.attributes["content"].strip()
+
+            # H1
+            h1 = tree.css_first("h1")
+            if h1:
+                row["h1"] = h1.text(strip=True)
+
+            # Langue
+            row["lang"] = detect_lang(tree)
+
+            # Canonical
+            row["canonical"] = extract_canonical(tree)
 
-def normalize_url(u):
-    return u.strip()
+            # Date de publication (best-effort)
+            row["pub_date"] = extract_pub_date(tree)
+
+            # Longueur du texte (approx)
+            row["text_length"] = text_length(tree)
+
+    except Timeout:
+        row["error"] = "Timeout"
+    except RequestException as e:
+        row["error"] = f"Requête échouée: {type(e).__name__}"
+    except Exception as e:
+        row["error"] = f"Erreur: {type(e).__name__}: {e}"
+
+    return row
 
 def main():
     parser = argparse.ArgumentParser(description="Scraper générique d'URLs depuis un fichier Excel vers CSV.")
@@ -95,9 +282,13 @@ def main():
     parser.add_argument("--sheet", default=DEFAULT_SHEET, help="Nom ou index de la feuille Excel")
     parser.add_argument("--url-col", default=DEFAULT_URL_COL, help="Nom de la colonne qui contient les URLs")
     parser.add_argument("--outfile", default=DEFAULT_OUTFILE, help="Chemin du CSV de sortie")
-    parser.add_argument("--delay", type=float, default=DEFAULT_DELAY, help="Délai (s) entre requêtes")
+    parser.add_argument("--delay", type=float, default=DEFAULT_DELAY, help="Délai (s) entre requêtes vers un même hôte")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Nombre de requêtes simultanées")
     parser.add_argument("--no-robots", action="store_true", help="Ignorer robots.txt (déconseillé)")
     parser.add_argument("--resume", action="store_true", help="Reprendre en sautant les URLs déjà présentes dans le CSV de sortie")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, help="Dossier du cache disque des pages HTML")
+    parser.add_argument("--cache-ttl", type=float, default=DEFAULT_CACHE_TTL, help="Durée de validité (s) du cache")
+    parser.add_argument("--no-cache", action="store_true", help="Ne pas lire ni écrire le cache disque")
     args = parser.parse_args()
 
     in_path = Path(args.infile)
@@ -106,17 +297,18 @@ def main():
     print(f"Lecture: {in_path} (sheet={args.sheet})")
 
     try:
-        df = pd.read_excel(in_path, sheet_name=args.sheet)
+        df = read_url_column(in_path, args.sheet, args.url_col)
     except Exception as e:
         sys.exit(f"Erreur de lecture Excel: {e}")
 
     if args.url_col not in df.columns:
-        sys.exit(f"Colonne '{args.url_col}' introuvable. Colonnes disponibles: {list(df.columns)}")
+        columns = list(pd.read_excel(in_path, sheet_name=args.sheet, nrows=0).columns)
+        sys.exit(f"Colonne '{args.url_col}' introuvable. Colonnes disponibles: {columns}")
 
     urls = (
         df[args.url_col]
         .astype(str)
-        .map(normalize_url)
+        .str.strip()
         .dropna()
         .drop_duplicates()
         .tolist()
@@ -152,96 +344,73 @@ def main():
 
     session = requests.Session()
     session.headers.update({"User-Agent": UA, "Accept-Language": "fr,fr-FR;q=0.9,en;q=0.8"})
+    # Pool de connexions keep-alive dimensionné pour les workers + retries sur erreurs transitoires
+    adapter = HTTPAdapter(
+        pool_connections=32,
+        pool_maxsize=64,
+        # read=False : un timeout de lecture n'est pas rejoué et reste signalé "Timeout" dans le CSV
+        max_retries=Retry(total=3, read=False, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504], raise_on_status=False),
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    cache_dir = None if args.no_cache else Path(args.cache_dir)
     robots_cache = {}
+    decision_cache = {}
+    host_delays = {}
+    host_locks = defaultdict(threading.Lock)
+    next_ok = defaultdict(float)  # hôte -> instant (time.monotonic) de la prochaine requête autorisée
+
+    todo = [u for u in urls if u not in processed]
+    total = len(todo)
 
     # Ouvre le CSV en mode ajout si reprise
     mode = "a" if args.resume and out_path.exists() else "w"
-    with out_path.open(mode, newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
+    with out_path.open(mode, newline="", encoding="utf-8", buffering=WRITE_BUFFER) as f, ThreadPoolExecutor(max_workers=args.workers) as pool:
+        # csv.writer + itemgetter : valeurs extraites dans l'ordre des colonnes, sans le contrôle par clé de DictWriter
+        writer = csv.writer(f)
+        row_values = itemgetter(*fieldnames)
         if mode == "w":
-            writer.writeheader()
-
-        total = len(urls)
-        for i, url in enumerate(urls, 1):
-            if url in processed:
-                continue
-
-            row = {
-                "source_url": url,
-                "final_url": "",
-                "status_code": "",
-                "title": "",
-                "meta_description": "",
-                "h1": "",
-                "lang": "",
-                "canonical": "",
-                "pub_date": "",
-                "text_length": "",
-                "error": "",
-            }
-
-            try:
-                if not args.no_robots and not is_allowed_by_robots(url, session, robots_cache):
-                    row["error"] = "Bloqué par robots.txt"
-                    writer.writerow(row)
-                    continue
-
-                resp = session.get(url, timeout=20, allow_redirects=True)
-                row["status_code"] = resp.status_code
-                row["final_url"] = resp.url
-
-                content_type = resp.headers.get("Content-Type", "")
-                if resp.status_code >= 400:
-                    row["error"] = f"HTTP {resp.status_code}"
-                elif "text/html" not in content_type.lower():
-                    row["error"] = f"Type non-HTML: {content_type}"
-                else:
-                    soup = BeautifulSoup(resp.text, "lxml")
-
-                    # Titre
-                    if soup.title and soup.title.string:
-                        row["title"] = soup.title.string.strip()
-
-                    # Meta description
-                    md = soup.find("meta", attrs={"name": re.compile("^description$", re.I)})
-                    if md and md.get("content"):
-                        row["meta_description"] = md["content"].strip()
-
-                    # H1
-                    h1 = soup.find("h1")
-                    if h1:
-                        row["h1"] = h1.get_text(strip=True)
-
-                    # Langue
-                    row["lang"] = detect_lang(soup)
-
-                    # Canonical
-                    row["canonical"] = extract_canonical(soup)
-
-                    # Date de publication (best-effort)
-                    row["pub_date"] = extract_pub_date(soup)
-
-                    # Longueur du texte (approx)
-                    text = soup.get_text(separator=" ", strip=True)
-                    row["text_length"] = len(text)
-
-                writer.writerow(row)
-
-            except Timeout:
-                row["error"] = "Timeout"
-                writer.writerow(row)
-            except RequestException as e:
-                row["error"] = f"Requête échouée: {type(e).__name__}"
-                writer.writerow(row)
-            except Exception as e:
-                row["error"] = f"Erreur: {type(e).__name__}: {e}"
-                writer.writerow(row)
-
-            # Progression simple
-            if i % 25 == 0 or i == total:
-                print(f"[{i}/{total}] traité(s)")
-
-            time.sleep(max(0.0, args.delay))
+            writer.writerow(fieldnames)
+
+        # robots.txt récupéré une seule fois par hôte, avant de lancer les requêtes
+        if not args.no_robots:
+            first_by_host = {}
+            for url in todo:
+                first_by_host.setdefault(urlparse(url).netloc, url)
+            list(pool.map(lambda u: get_robots(u, session, robots_cache), first_by_host.values()))
+            for netloc, url in first_by_host.items():
+                host_delays[netloc] = host_delay(url, session, robots_cache, args.delay)
+
+        futures = [
+            pool.submit(
+                scrape_url, url, session, robots_cache, decision_cache, host_locks, next_ok,
+                host_delays.get(urlparse(url).netloc, args.delay), not args.no_robots,
+                cache_dir, args.cache_ttl,
+            )
+            for url in todo
+        ]
+        # Seul le thread principal écrit dans le CSV
+        # Lignes écrites par lots de WRITE_BATCH pour limiter les appels d'écriture
+        batch = []
+        try:
+            for i, fut in enumerate(as_completed(futures), 1):
+                batch.append(row_values(fut.result()))
+                if len(batch) >= WRITE_BATCH:
+                    writer.writerows(batch)
+                    batch.clear()
+
+                # Progression simple
+                if i % 25 == 0 or i == total:
+                    print(f"[{i}/{total}] traité(s)")
+        except KeyboardInterrupt:
+            # Annule les URLs pas encore lancées : la sortie du with n'attend plus
+            # que les requêtes déjà en cours
+            pool.shutdown(wait=False, cancel_futures=True)
+            print("Interrompu : URLs restantes annulées.")
+            raise
+        finally:
+            # Le reste est écrit même en cas d'interruption, pour que --resume le retrouve
+            writer.writerows(batch)
 
     print(f"Terminé. CSV écrit: {out_path.resolve()}")
 
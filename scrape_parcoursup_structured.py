@@ -7,9 +7,9 @@ Entrée : un fichier Excel avec une colonne d'URLs (par défaut : "Lien de la fo
 Sortie : un CSV avec des champs structurés (établissement, libellé, ville, frais, langues, places/voeux, liens, emails, etc.)
 
 Stratégie :
-1) Extraire g_ta_cod depuis l'URL
-2) Interroger l'API OpenData MESR "fr-esr-cartographie_formations_parcoursup" (quand disponible) pour obtenir des champs fiables
-3) Compléter via parsing HTML (BeautifulSoup + regex) pour les items visibles dans la page (frais, langues, places, vœux confirmés, emails…)
+1) Extraire g_ta_cod depuis l'URL (une passe vectorisée sur toute la colonne)
+2) Interroger l'API OpenData MESR "fr-esr-cartographie_formations_parcoursup" (quand disponible, par lots de codes) pour obtenir des champs fiables
+3) Compléter via parsing HTML (selectolax/lexbor + regex) pour les items visibles dans la page (frais, langues, places, vœux confirmés, emails…)
 4) Sauvegarder un CSV (une ligne par URL). Reprise possible.
 
 Usage minimal :
@@ -19,19 +19,37 @@ Options clés :
   --infile "liens dossier formation.xlsx"  # Excel d'entrée
   --url-col "Lien de la formation sur la plateforme Parcoursup"  # colonne des URLs
   --annee 2025  # année à cibler (opendata)
-  --delay 0.7   # délai entre requêtes
+  --delay 0.7   # délai entre requêtes vers un même hôte
+  --workers 16  # requêtes simultanées
+  --parse-workers 8  # processus de parsing HTML (défaut : nb de cœurs)
+  --no-cache    # ignorer le cache disque des pages et des champs extraits (--cache-dir, --cache-ttl)
 """
+import os
 import sys
 import csv
 import re
 import time
+import gzip
+import zlib
+import hashlib
 import argparse
+import shelve
+import threading
+from collections import defaultdict
+from contextlib import nullcontext
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from operator import itemgetter
 from pathlib import Path
-from urllib.parse import urlparse, parse_qs
+from urllib.parse import urlparse
 
+import orjson
+from blake3 import blake3
 import requests
+from requests.adapters import HTTPAdapter
 from requests.exceptions import RequestException, Timeout
-from bs4 import BeautifulSoup
+from urllib3.util.retry import Retry
+from selectolax.lexbor import LexborHTMLParser
 import pandas as pd
 
 DEFAULT_INFILE = "liens dossier formation.xlsx"
@@ -39,199 +57,327 @@ DEFAULT_SHEET = 0
 DEFAULT_URL_COL = "Lien de la formation sur la plateforme Parcoursup"
 DEFAULT_OUTFILE = "parcoursup_fiches_struct.csv"
 DEFAULT_DELAY = 0.7
+DEFAULT_WORKERS = 16
+WRITE_BATCH = 100  # lignes CSV écrites d'un coup
+WRITE_BUFFER = 1 << 20  # tampon du fichier de sortie (octets)
+MAX_BYTES = 2_000_000  # taille max lue par page HTML
+# Contenus non affichés, exclus du texte visible (comme get_text de bs4, qui garde <noscript>)
+NON_TEXT_TAGS = frozenset(["script", "style", "template"])
+DEFAULT_CACHE_DIR = "cache_html"  # partagé avec scrape_liens_parcoursup_old.py
+DEFAULT_CACHE_TTL = 86400  # secondes
+PARSE_CACHE_NAME = "parsed"  # shelve dans --cache-dir : hash du HTML -> champs extraits
+# Empreinte du script : toute modification du parseur ou de ses regex invalide le cache
+PARSE_CACHE_VERSION = blake3(Path(__file__).read_bytes()).hexdigest()[:16]
+PARSE_CACHE_LOCK = threading.Lock()  # shelve n'est pas thread-safe
 
 UA = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0 Safari/537.36"
 HEADERS = {"User-Agent": UA, "Accept-Language": "fr,fr-FR;q=0.9,en;q=0.8"}
 
 OD_API = "https://data.enseignementsup-recherche.gouv.fr/api/explore/v2.1/catalog/datasets/fr-esr-cartographie_formations_parcoursup/records"
+OD_BATCH_SIZE = 100  # codes g_ta_cod par requête OpenData
+OD_PAGE_SIZE = 100  # maximum accepté par l'API Explore v2.1
+
+FIELDNAMES = [
+    "source_url",
+    "g_ta_cod",
+    # OpenData
+    "od_libelle_formation",
+    "od_libelle_etablissement",
+    "od_diplome",
+    "od_secteur",
+    "od_academie",
+    "od_departement",
+    "od_commune",
+    "od_code_postal",
+    "od_uai",
+    # HTML/Fallback
+    "titre_bloc",
+    "places",
+    "voeux_confirmes",
+    "candidats_postules",
+    "propositions",
+    "integres",
+    "frais_annee",
+    "frais_boursiers",
+    "lv1",
+    "lv2",
+    "niveau_francais",
+    "onisep_url",
+    "catalogue_url",
+    "emails_contact",
+    "criteres_analyse",
+    "chiffres_acces",
+    "poursuites_etudes",
+    "debouches",
+    "contacter_etablissement",
+    # Statut requête
+    "http_status",
+    "error",
+]
+ROW_TEMPLATE = dict.fromkeys(FIELDNAMES, "")  # copié pour chaque ligne
+
+G_TA_COD_RE = r"[?&]g_ta_cod=(\d+)"  # appliqué à toute la colonne via Series.str.extract
 
 EMAIL_RE = re.compile(r"[A-Z0-9._%+-]+@[A-Z0-9.-]+\.[A-Z]{2,}", re.I)
 
+# Regex compilées une fois pour toutes (appelées pour chaque page)
+DIGIT_RE = re.compile(r"\d")
+NON_DIGITS_RE = re.compile(r"\D+")
+FRAIS_ANNEE_RE = re.compile(r"Par année\s*:?[\s\-]*([0-9\.\s\u00A0€euros]+)", re.I)
+FRAIS_BOURSIERS_RE = re.compile(r"boursier[s]?\s*[:\-]?\s*(.+?)(?:$|\.)", re.I)
+LV1_RE = re.compile(r"Langue vivante 1\s*:\s*(.+?)(?:\s{2,}|$)", re.I)
+LV2_RE = re.compile(r"Langue vivante 2\s*:\s*(.+?)(?:\s{2,}|$)", re.I)
+NIVEAU_FR_RE = re.compile(r"Niveau de français requis.*?:\s*([A-C][12])", re.I)
+# Un groupe nommé par indicateur, même nom que la colonne CSV
+CHIFFRES_RE = re.compile(
+    r"(?P<places>\d[\d\s\u00A0]*)\s+places?\s+en\s+\d{4}"
+    r"|(?P<voeux_confirmes>\d[\d\s\u00A0]*)\s+v[œo]ux\s+confirm[ée]s?\s+en\s+\d{4}"
+    r"|(?P<candidats_postules>\d[\d\s\u00A0]*)\s+candidats?\s+ont\s+postulé"
+    r"|(?P<propositions>\d[\d\s\u00A0]*)\s+candidats?\s+ont\s+pu\s+recevoir\s+une\s+proposition"
+    r"|(?P<integres>\d[\d\s\u00A0]*)\s+candidats?\s+ont\s+choisi\s+d'intégrer",
+    re.I,
+)
+
+# Titres de sections recherchés dans la page
+FRAIS_HEADING_RE = re.compile(r"Frais\s+de\s+scolarité", re.I)
+LANGUES_HEADING_RE = re.compile(r"Langues?\s+et\s+options", re.I)
+CRITERES_HEADINGS = tuple(re.compile(p, re.I) for p in [
+    r"Comprendre\s+les\s+crit[eè]res\s+d'?analyse\s+des\s+candidatures",
+    r"Crit[eè]res\s+d'?analyse\s+des\s+candidatures",
+])
+CHIFFRES_ACCES_HEADINGS = tuple(re.compile(p, re.I) for p in [
+    r"Consulter\s+les\s+chiffres\s+d[’']acc[eè]s?\s+\w*\s+la\s+formation",
+    r"Chiffres\s+d[’']acc[eè]s?\s+\w*\s+la\s+formation",
+    r"Les\s+chiffres\s+globaux\s+d[’']acc[eè]s",
+])
+POURSUITES_HEADINGS = tuple(re.compile(p, re.I) for p in [
+    r"Poursuivre\s+ses\s+[eé]tudes",
+    r"Poursuites?\s+d[’']?[eé]tudes",
+])
+DEBOUCHES_HEADINGS = tuple(re.compile(p, re.I) for p in [
+    r"conn[aîi]tre\s+les\s+d[eé]bouch[ée]s",
+    r"D[eé]bouch[ée]s",
+])
+CONTACT_HEADINGS = tuple(re.compile(p, re.I) for p in [
+    r"Contacter\s+et\s+[eé]changer\s+avec\s+l[’']?[eé]tablissement",
+    r"Contacts?\s+et\s+[eé]changes?",
+    r"Contact",
+])
+
+HEADING_TAGS = frozenset(["h1", "h2", "h3", "h4", "h5", "h6", "strong"])
+SHORT_BLOCK_TAGS = frozenset(["p", "li", "div", "span", "dd"])
+SECTION_BLOCK_TAGS = SHORT_BLOCK_TAGS | {"td", "th"}
+# Sélecteurs CSS évalués par lexbor (C) : seuls les titres et blocs de contenu remontent en Python.
+# LexborHTMLParser.css renvoie les nœuds dans l'ordre du document (pas groupés par sélecteur,
+# contrairement au backend Modest), ce dont dépend extract_all_sections.
+HEADING_SEL = "h1,h2,h3,h4,h5,h6,strong"
+SECTION_NODES_SEL = HEADING_SEL + ",p,li,div,span,dd,td,th"
+
+# (nom, titres, balises de contenu collectées, nb max de caractères)
+SECTION_DEFS = [
+    ("frais", (FRAIS_HEADING_RE,), SHORT_BLOCK_TAGS, 400),
+    ("langues", (LANGUES_HEADING_RE,), SHORT_BLOCK_TAGS, 400),
+    ("criteres_analyse", CRITERES_HEADINGS, SECTION_BLOCK_TAGS, 4000),
+    ("chiffres_acces", CHIFFRES_ACCES_HEADINGS, SECTION_BLOCK_TAGS, 4000),
+    ("poursuites_etudes", POURSUITES_HEADINGS, SECTION_BLOCK_TAGS, 4000),
+    ("debouches", DEBOUCHES_HEADINGS, SECTION_BLOCK_TAGS, 4000),
+    ("contacter_etablissement", CONTACT_HEADINGS, SECTION_BLOCK_TAGS, 4000),
+]
+
 def norm_spaces(s: str) -> str:
     return " ".join(s.split())
 
 def parse_int(s: str):
     s = s or ""
     s = s.replace("\u00A0", " ").replace(" ", "")
-    return int(re.sub(r"\D+", "", s)) if re.search(r"\d", s) else None
+    return int(NON_DIGITS_RE.sub("", s)) if DIGIT_RE.search(s) else None
+
+def cache_path(cache_dir, url):
+    h = hashlib.sha1(url.encode("utf-8")).hexdigest()
+    return cache_dir / h[:2] / f"{h[2:]}.html.gz"
 
-def get_g_ta_cod(url: str):
+def cache_load(cache_dir, url, ttl):
+    """
+    Page HTML en cache disque : retourne (final_url, corps) si présente et
+    plus récente que `ttl` secondes, sinon None.
+    """
+    path = cache_path(cache_dir, url)
     try:
-        q = parse_qs(urlparse(url).query)
-        vals = q.get("g_ta_cod") or q.get("g_ta_cod=")
-        if vals:
-            return str(vals[0]).strip()
-    except Exception:
-        pass
-    return None
-
-def opendata_fetch(g_ta_cod: str, session: requests.Session):
-    params = {"limit": 1, "where": f"g_ta_cod={g_ta_cod}", "order_by": "annee DESC"}
+        if time.time() - path.stat().st_mtime > ttl:
+            return None
+        with gzip.open(path, "rb") as fh:
+            final_url, _, body = fh.read().partition(b"\n")
+        final_url = final_url.decode("utf-8")
+    except (OSError, EOFError, zlib.error, UnicodeDecodeError):
+        # Entrée illisible ou corrompue : traitée comme absente, puis réécrite
+        return None
+    return final_url, body
+
+def cache_store(cache_dir, url, final_url, body):
+    # Fichier gzip : URL finale sur la première ligne, puis le corps HTML
+    # Un échec d'écriture (disque plein, droits...) ne fait que sauter la mise en cache
+    path = cache_path(cache_dir, url)
+    tmp = path.parent / f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp"
     try:
-        r = session.get(OD_API, params=params, timeout=20)
-        if r.status_code == 200:
-            out = r.json()
-            recs = out.get("results") or []
-            if recs:
-                return recs[0]
-    except Exception:
-        pass
-    return {}
-
-def extract_text_after_heading(soup: BeautifulSoup, heading_regex: str, max_chars=400):
-    pat = re.compile(heading_regex, re.I)
-    tags = soup.find_all(lambda t: t.name in ["h1","h2","h3","h4","h5","h6","strong"] and t.get_text(strip=True) and pat.search(t.get_text(" ", strip=True)))
-    if not tags:
-        return ""
-    t = tags[0]
-    texts = []
-    for el in t.find_all_next():
-        if el == t:
-            continue
-        if el.name in ["h1","h2","h3","h4","h5","h6","strong"]:
-            break
-        if el.name in ["p","li","div","span","dd"]:
-            txt = norm_spaces(el.get_text(" ", strip=True))
-            if txt:
-                texts.append(txt)
-        if sum(len(x) for x in texts) > max_chars:
-            break
-    return norm_spaces(" ".join(texts))
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with gzip.open(tmp, "wb") as fh:
+            fh.write(final_url.encode("utf-8") + b"\n" + body)
+        os.replace(tmp, path)
+    except OSError:
+        try:
+            tmp.unlink(missing_ok=True)
+        except OSError:
+            pass
 
-def collect_section_text(soup, heading_patterns, max_chars=4000):
+def opendata_fetch_batch(gids, session: requests.Session):
     """
-    Trouve un bloc de contenu qui suit un titre correspondant à l'un des patterns.
-    Concatène textes des p/li/div/td jusqu'au prochain titre.
+    Récupère les enregistrements OpenData pour une liste de g_ta_cod, par lots de
+    OD_BATCH_SIZE codes (une requête paginée par lot au lieu d'une par URL).
+    Retourne {g_ta_cod: enregistrement le plus récent}.
     """
-    pats = [re.compile(p, re.I) for p in heading_patterns]
-    def is_heading(t):
-        return t.name in ["h1","h2","h3","h4","h5","h6","strong"]
-    # Chercher le premier titre qui matche
-    for tag in soup.find_all(lambda t: is_heading(t) and t.get_text(strip=True)):
-        txt = tag.get_text(" ", strip=True)
-        if any(p.search(txt) for p in pats):
-            # collecter le contenu suivant
-            chunks = []
-            for el in tag.find_all_next():
-                if el == tag: 
-                    continue
-                if is_heading(el):
-                    break
-                if el.name in ["p","li","div","span","dd","td","th"]:
-                    ttxt = el.get_text(" ", strip=True)
-                    if ttxt:
-                        chunks.append(ttxt)
-                if sum(len(x) for x in chunks) > max_chars:
+    by_gid = {}
+    codes = [g for g in gids if g.isdigit()]
+    for start in range(0, len(codes), OD_BATCH_SIZE):
+        where = " OR ".join(f"g_ta_cod={g}" for g in codes[start:start + OD_BATCH_SIZE])
+        offset = 0
+        while True:
+            # g_ta_cod départage les enregistrements d'une même année : ordre total, donc
+            # pages stables d'une requête à l'autre (ni doublon ni trou aux frontières)
+            params = {"limit": OD_PAGE_SIZE, "offset": offset, "where": where, "order_by": "annee DESC, g_ta_cod"}
+            try:
+                r = session.get(OD_API, params=params, timeout=20)
+                if r.status_code != 200:
                     break
-            return norm_spaces(" ".join(chunks))
-    return ""
+                # orjson directement sur les octets : pas de décodage str intermédiaire
+                recs = orjson.loads(r.content).get("results") or []
+            except Exception:
+                break
+            for rec in recs:
+                # Tri par année décroissante : le premier enregistrement vu est le plus récent
+                by_gid.setdefault(str(rec.get("g_ta_cod")), rec)
+            if len(recs) < OD_PAGE_SIZE:
+                break
+            offset += OD_PAGE_SIZE
+    return by_gid
+
+def decode_html(body: bytes) -> str:
+    # lexbor suppose de l'UTF-8 ; repli cp1252 pour les rares pages en latin
+    try:
+        return body.decode("utf-8")
+    except UnicodeDecodeError:
+        return body.decode("cp1252", errors="replace")
 
-def parse_html_fields(html: str):
-    soup = BeautifulSoup(html, "lxml")
-    text = soup.get_text("\n", strip=True)
+def extract_all_sections(tree: LexborHTMLParser, section_defs):
+    """
+    Extrait, en un seul parcours du document, le texte qui suit le premier titre
+    correspondant à chaque section, jusqu'au titre suivant.
+    section_defs : liste de (nom, patterns compilés, balises de contenu, max_chars).
+    Retourne {nom: texte}.
+    """
+    chunks = {name: [] for name, _, _, _ in section_defs}
+    sizes = dict.fromkeys(chunks, 0)
+    pending = list(section_defs)  # sections dont le titre n'a pas encore été rencontré
+    active = []  # sections en cours de collecte
+    # Ordre du document garanti par le backend lexbor (voir SECTION_NODES_SEL)
+    for node in tree.css(SECTION_NODES_SEL):
+        tag = node.tag
+        if tag in HEADING_TAGS:
+            # Tout titre clôt les sections en cours
+            active = []
+            if not pending:
+                break
+            txt = node.text(separator=" ", strip=True)
+            if txt:
+                for sec in [d for d in pending if any(p.search(txt) for p in d[1])]:
+                    pending.remove(sec)
+                    active.append(sec)
+        elif active:
+            txt = None
+            for name, _, tags, _ in active:
+                if tag in tags:
+                    if txt is None:
+                        txt = norm_spaces(node.text(separator=" ", strip=True))
+                    if txt:
+                        chunks[name].append(txt)
+                        sizes[name] += len(txt)
+            active = [sec for sec in active if sizes[sec[0]] <= sec[3]]
+    return {name: norm_spaces(" ".join(parts)) for name, parts in chunks.items()}
+
+def parse_html_fields(html: bytes):
+    tree = LexborHTMLParser(decode_html(html))
+    # Code et gabarits non affichés : ne doivent alimenter ni les regex ni les sections
+    tree.strip_tags(list(NON_TEXT_TAGS))
+    # Texte de la page extrait une seule fois, réutilisé par toutes les recherches regex
+    text = tree.root.text(separator="\n", strip=True)
+    sections = extract_all_sections(tree, SECTION_DEFS)
 
     # Frais de scolarité
     frais_annee = ""
     frais_boursiers = ""
-    bloc_frais = extract_text_after_heading(soup, r"Frais\s+de\s+scolarité")
+    bloc_frais = sections["frais"]
     if not bloc_frais:
         bloc_frais = "\n".join([l for l in text.splitlines() if "Frais de scolarité" in l or "Par année" in l])
     if bloc_frais:
-        m = re.search(r"Par année\s*:?[\s\-]*([0-9\.\s\u00A0€euros]+)", bloc_frais, flags=re.I)
+        m = FRAIS_ANNEE_RE.search(bloc_frais)
         if m:
             frais_annee = norm_spaces(m.group(1).replace("euros", "€"))
-        m2 = re.search(r"boursier[s]?\s*[:\-]?\s*(.+?)(?:$|\.)", bloc_frais, flags=re.I)
+        m2 = FRAIS_BOURSIERS_RE.search(bloc_frais)
         if m2:
             frais_boursiers = norm_spaces(m2.group(1))
 
     # Langues et options
     lv1 = lv2 = niveau_fr = ""
-    bloc_langues = extract_text_after_heading(soup, r"Langues?\s+et\s+options")
+    bloc_langues = sections["langues"]
     if bloc_langues:
-        m = re.search(r"Langue vivante 1\s*:\s*(.+?)(?:\s{2,}|$)", bloc_langues, flags=re.I)
+        m = LV1_RE.search(bloc_langues)
         if m: lv1 = m.group(1).strip(" .;")
-        m = re.search(r"Langue vivante 2\s*:\s*(.+?)(?:\s{2,}|$)", bloc_langues, flags=re.I)
+        m = LV2_RE.search(bloc_langues)
         if m: lv2 = m.group(1).strip(" .;")
-        m = re.search(r"Niveau de français requis.*?:\s*([A-C][12])", bloc_langues, flags=re.I)
+        m = NIVEAU_FR_RE.search(bloc_langues)
         if m: niveau_fr = m.group(1)
 
-    # Places et vœux confirmés
-    places = None
-    voeux_confirmes = None
-    top_block = text
-    m_places = re.search(r"(\d[\d\s\u00A0]*)\s+places?\s+en\s+\d{4}", top_block, flags=re.I)
-    if m_places:
-        places = parse_int(m_places.group(1))
-    m_voeux = re.search(r"(\d[\d\s\u00A0]*)\s+v[œo]ux\s+confirm[ée]s?\s+en\s+\d{4}", top_block, flags=re.I)
-    if m_voeux:
-        voeux_confirmes = parse_int(m_voeux.group(1))
-
-    # Chiffres globaux
-    candidats_postules = propositions = integ = None
-    m = re.search(r"(\d[\d\s\u00A0]*)\s+candidats?\s+ont\s+postulé", text, flags=re.I)
-    if m: candidats_postules = parse_int(m.group(1))
-    m = re.search(r"(\d[\d\s\u00A0]*)\s+candidats?\s+ont\s+pu\s+recevoir\s+une\s+proposition", text, flags=re.I)
-    if m: propositions = parse_int(m.group(1))
-    m = re.search(r"(\d[\d\s\u00A0]*)\s+candidats?\s+ont\s+choisi\s+d'intégrer", text, flags=re.I)
-    if m: integ = parse_int(m.group(1))
+    # Places, vœux confirmés et chiffres globaux : un seul passage sur le texte,
+    # premier nombre trouvé pour chaque indicateur
+    chiffres = dict.fromkeys(CHIFFRES_RE.groupindex)
+    for m in CHIFFRES_RE.finditer(text):
+        if chiffres[m.lastgroup] is None:
+            chiffres[m.lastgroup] = parse_int(m.group(m.lastgroup))
+            if None not in chiffres.values():
+                break
 
     # Liens
     onisep_url = ""
     cat_url = ""
-    for a in soup.find_all("a", href=True):
-        href = a["href"]
-        label = a.get_text(" ", strip=True).lower()
-        if "onisep" in href or "onisep" in label:
-            onisep_url = href
-        if "catalogue" in label or "catalogue" in href or "formations.u-" in href:
-            cat_url = href
+    for a in tree.css("a[href]"):
+        href = a.attributes.get("href") or ""
+        href_lo = href.lower()
+        label = None  # texte du lien, calculé seulement si l'href ne suffit pas
+        if not onisep_url:
+            if "onisep" in href_lo:
+                onisep_url = href
+            else:
+                label = a.text(separator=" ", strip=True).lower()
+                if "onisep" in label:
+                    onisep_url = href
+        if not cat_url:
+            if "catalogue" in href_lo or "formations.u-" in href_lo:
+                cat_url = href
+            else:
+                if label is None:
+                    label = a.text(separator=" ", strip=True).lower()
+                if "catalogue" in label:
+                    cat_url = href
+        if onisep_url and cat_url:
+            break
 
     # Emails
-    emails = sorted(set(re.findall(EMAIL_RE, text)))
+    emails = sorted(set(EMAIL_RE.findall(text)))
 
     # Titre
     titre_bloc = ""
-    if soup.title and soup.title.string:
-        titre_bloc = norm_spaces(soup.title.string)
-
-    # ---- Sections demandées ----
-    criteres_analyse = collect_section_text(
-        soup,
-        [
-            r"Comprendre\s+les\s+crit[eè]res\s+d'?analyse\s+des\s+candidatures",
-            r"Crit[eè]res\s+d'?analyse\s+des\s+candidatures",
-        ]
-    )
-    chiffres_acces = collect_section_text(
-        soup,
-        [
-            r"Consulter\s+les\s+chiffres\s+d[’']acc[eè]s?\s+\w*\s+la\s+formation",
-            r"Chiffres\s+d[’']acc[eè]s?\s+\w*\s+la\s+formation",
-            r"Les\s+chiffres\s+globaux\s+d[’']acc[eè]s",
-        ]
-    )
-    poursuites_etudes = collect_section_text(
-        soup,
-        [
-            r"Poursuivre\s+ses\s+[eé]tudes",
-            r"Poursuites?\s+d[’']?[eé]tudes",
-        ]
-    )
-    debouches = collect_section_text(
-        soup,
-        [
-            r"conn[aîi]tre\s+les\s+d[eé]bouch[ée]s",
-            r"D[eé]bouch[ée]s",
-        ]
-    )
-    contacter = collect_section_text(
-        soup,
-        [
-            r"Contacter\s+et\s+[eé]changer\s+avec\s+l[’']?[eé]tablissement",
-            r"Contacts?\s+et\s+[eé]changes?",
-            r"Contact",
-        ]
-    )
+    title = tree.css_first("title")
+    if title:
+        titre_bloc = norm_spaces(title.text())
 
     return {
         "frais_annee": frais_annee,
@@ -239,22 +385,111 @@ def parse_html_fields(html: str):
         "lv1": lv1,
         "lv2": lv2,
         "niveau_francais": niveau_fr,
-        "places": places,
-        "voeux_confirmes": voeux_confirmes,
-        "candidats_postules": candidats_postules,
-        "propositions": propositions,
-        "integres": integ,
+        "places": chiffres["places"],
+        "voeux_confirmes": chiffres["voeux_confirmes"],
+        "candidats_postules": chiffres["candidats_postules"],
+        "propositions": chiffres["propositions"],
+        "integres": chiffres["integres"],
         "onisep_url": onisep_url,
         "catalogue_url": cat_url,
         "emails_contact": ";".join(emails) if emails else "",
-        "criteres_analyse": criteres_analyse,
-        "chiffres_acces": chiffres_acces,
-        "poursuites_etudes": poursuites_etudes,
-        "debouches": debouches,
-        "contacter_etablissement": contacter,
+        "criteres_analyse": sections["criteres_analyse"],
+        "chiffres_acces": sections["chiffres_acces"],
+        "poursuites_etudes": sections["poursuites_etudes"],
+        "debouches": sections["debouches"],
+        "contacter_etablissement": sections["contacter_etablissement"],
         "titre_bloc": titre_bloc,
     }
 
+def read_url_column(in_path, sheet, url_col):
+    # Ne lit que la colonne des URLs ; moteur calamine (Rust) si disponible, sinon openpyxl
+    try:
+        return pd.read_excel(in_path, sheet_name=sheet, usecols=lambda c: c == url_col, engine="calamine")
+    except (ImportError, ValueError):
+        # python-calamine absent ou pandas < 2.2
+        return pd.read_excel(in_path, sheet_name=sheet, usecols=lambda c: c == url_col, engine="openpyxl")
+
+def parse_cached(body: bytes, parse_pool, parse_cache):
+    """
+    parse_html_fields mémoïsé sur le hash blake3 du HTML (préfixé par l'empreinte
+    du script) : une page déjà vue (relance, page en cache disque) n'est pas
+    re-parsée tant que le code n'a pas changé.
+    """
+    key = f"{PARSE_CACHE_VERSION}:{blake3(body).hexdigest()}"
+    with PARSE_CACHE_LOCK:
+        parsed = parse_cache.get(key)
+    if parsed is None:
+        # Parsing (CPU) délégué à un processus : pas de contention sur le GIL entre workers
+        parsed = parse_pool.submit(parse_html_fields, body).result()
+        with PARSE_CACHE_LOCK:
+            parse_cache[key] = parsed
+    return parsed
+
+def wait_for_host(netloc, delay, host_locks, next_ok):
+    """
+    Politesse par hôte : attend le créneau réservé pour `netloc` (sans attendre
+    si l'hôte n'a pas été sollicité depuis `delay` secondes) puis réserve le suivant.
+    """
+    with host_locks[netloc]:
+        wait = next_ok[netloc] - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+        next_ok[netloc] = time.monotonic() + delay
+
+def scrape_url(url: str, gid: str, session: requests.Session, od_by_gid, host_locks, next_ok, delay: float,
+               parse_pool, parse_cache, cache_dir=None, cache_ttl=DEFAULT_CACHE_TTL):
+    row = ROW_TEMPLATE.copy()
+    row["source_url"] = url
+
+    try:
+        row["g_ta_cod"] = gid
+
+        # OpenData
+        od = od_by_gid.get(gid, {}) if gid else {}
+        if od:
+            row["od_libelle_formation"] = od.get("libelle_formation") or od.get("libelle_long") or ""
+            row["od_libelle_etablissement"] = od.get("libelle_etablissement") or od.get("etablissement") or ""
+            row["od_diplome"] = od.get("type_de_formation") or od.get("diplome") or ""
+            row["od_secteur"] = od.get("secteur") or ""
+            row["od_academie"] = od.get("academie") or od.get("nom_academie") or ""
+            row["od_departement"] = od.get("departement") or od.get("nom_departement") or ""
+            row["od_commune"] = od.get("commune") or ""
+            row["od_code_postal"] = od.get("code_postal") or ""
+            row["od_uai"] = od.get("uai") or ""
+
+        # HTML
+        try:
+            body = None
+            cached = cache_load(cache_dir, url, cache_ttl) if cache_dir else None
+            if cached:
+                row["http_status"] = 200
+                body = cached[1]
+            else:
+                wait_for_host(urlparse(url).netloc, delay, host_locks, next_ok)
+                with session.get(url, stream=True, timeout=25) as r:
+                    row["http_status"] = r.status_code
+                    # En-têtes vérifiés avant de télécharger le corps, plafonné à MAX_BYTES
+                    if r.status_code == 200 and "text/html" in (r.headers.get("Content-Type","").lower()):
+                        body = r.raw.read(MAX_BYTES, decode_content=True)
+                        if cache_dir:
+                            cache_store(cache_dir, url, r.url, body)
+            if body is not None:
+                try:
+                    parsed = parse_cached(body, parse_pool, parse_cache)
+                    for k, v in parsed.items():
+                        row[k] = v
+                except Exception as e:
+                    row["error"] = f"Parse error: {type(e).__name__}: {e}"
+        except Timeout:
+            row["error"] = "Timeout"
+        except RequestException as e:
+            row["error"] = f"HTTP error: {type(e).__name__}"
+
+    except Exception as e:
+        row["error"] = f"Erreur: {type(e).__name__}: {e}"
+
+    return row
+
 def main():
     ap = argparse.ArgumentParser()
     ap.add_argument("--infile", default=DEFAULT_INFILE)
@@ -262,7 +497,12 @@ def main():
     ap.add_argument("--url-col", default=DEFAULT_URL_COL)
     ap.add_argument("--outfile", default=DEFAULT_OUTFILE)
     ap.add_argument("--delay", type=float, default=DEFAULT_DELAY)
+    ap.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    ap.add_argument("--parse-workers", type=int, default=os.cpu_count())
     ap.add_argument("--resume", action="store_true")
+    ap.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR)
+    ap.add_argument("--cache-ttl", type=float, default=DEFAULT_CACHE_TTL)
+    ap.add_argument("--no-cache", action="store_true")
     args = ap.parse_args()
 
     in_path = Path(args.infile)
@@ -270,12 +510,13 @@ def main():
         sys.exit(f"Fichier d'entrée introuvable: {in_path}")
 
     try:
-        df = pd.read_excel(in_path, sheet_name=args.sheet)
+        df = read_url_column(in_path, args.sheet, args.url_col)
     except Exception as e:
         sys.exit(f"Erreur de lecture Excel: {e}")
 
     if args.url_col not in df.columns:
-        sys.exit(f"Colonne '{args.url_col}' introuvable. Colonnes dispo: {list(df.columns)}")
+        columns = list(pd.read_excel(in_path, sheet_name=args.sheet, nrows=0).columns)
+        sys.exit(f"Colonne '{args.url_col}' introuvable. Colonnes dispo: {columns}")
 
     urls = (
         df[args.url_col]
@@ -283,49 +524,11 @@ def main():
         .str.strip()
         .dropna()
         .drop_duplicates()
-        .tolist()
     )
-    if not urls:
+    if urls.empty:
         sys.exit("Aucune URL à traiter.")
 
     out_path = Path(args.outfile)
-    fieldnames = [
-        "source_url",
-        "g_ta_cod",
-        # OpenData
-        "od_libelle_formation",
-        "od_libelle_etablissement",
-        "od_diplome",
-        "od_secteur",
-        "od_academie",
-        "od_departement",
-        "od_commune",
-        "od_code_postal",
-        "od_uai",
-        # HTML/Fallback
-        "titre_bloc",
-        "places",
-        "voeux_confirmes",
-        "candidats_postules",
-        "propositions",
-        "integres",
-        "frais_annee",
-        "frais_boursiers",
-        "lv1",
-        "lv2",
-        "niveau_francais",
-        "onisep_url",
-        "catalogue_url",
-        "emails_contact",
-        "criteres_analyse",
-        "chiffres_acces",
-        "poursuites_etudes",
-        "debouches",
-        "contacter_etablissement",
-        # Statut requête
-        "http_status",
-        "error",
-    ]
 
     mode = "a" if args.resume and out_path.exists() else "w"
     done = set()
@@ -338,60 +541,71 @@ def main():
 
     session = requests.Session()
     session.headers.update(HEADERS)
-
-    with out_path.open(mode, newline="", encoding="utf-8") as f:
-        wr = csv.DictWriter(f, fieldnames=fieldnames)
+    # Pool de connexions keep-alive dimensionné pour les workers + retries sur erreurs transitoires
+    adapter = HTTPAdapter(
+        pool_connections=32,
+        pool_maxsize=64,
+        # read=False : un timeout de lecture n'est pas rejoué et reste signalé "Timeout" dans le CSV
+        max_retries=Retry(total=3, read=False, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504], raise_on_status=False),
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    host_locks = defaultdict(threading.Lock)
+    next_ok = defaultdict(float)  # hôte -> instant (time.monotonic) de la prochaine requête autorisée
+    cache_dir = None if args.no_cache else Path(args.cache_dir)
+    if cache_dir:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        parse_store = shelve.open(str(cache_dir / PARSE_CACHE_NAME))
+        if parse_store.get("version") != PARSE_CACHE_VERSION:
+            # Script modifié : les entrées existantes ne seraient plus jamais relues
+            parse_store.clear()
+            parse_store["version"] = PARSE_CACHE_VERSION
+    else:
+        parse_store = nullcontext({})
+
+    todo = urls[~urls.isin(done)]
+    todo_gids = todo.str.extract(G_TA_COD_RE, expand=False).fillna("")
+
+    # OpenData : requêtes groupées pour tous les g_ta_cod avant de lancer les pages
+    gids = sorted(set(todo_gids) - {""})
+    od_by_gid = opendata_fetch_batch(gids, session)
+    print(f"OpenData: {len(od_by_gid)}/{len(gids)} formations trouvées")
+
+    # "spawn" : pas de fork d'un processus qui a déjà des threads réseau actifs
+    parse_pool = ProcessPoolExecutor(max_workers=args.parse_workers, mp_context=multiprocessing.get_context("spawn"))
+
+    with out_path.open(mode, newline="", encoding="utf-8", buffering=WRITE_BUFFER) as f, parse_pool, parse_store as parse_cache, ThreadPoolExecutor(max_workers=args.workers) as pool:
+        # csv.writer + itemgetter : valeurs extraites dans l'ordre des colonnes, sans le contrôle par clé de DictWriter
+        wr = csv.writer(f)
+        row_values = itemgetter(*FIELDNAMES)
         if mode == "w":
-            wr.writeheader()
-
-        for i, url in enumerate(urls, 1):
-            if url in done:
-                continue
+            wr.writerow(FIELDNAMES)
 
-            row = dict.fromkeys(fieldnames, "")
-            row["source_url"] = url
-
-            try:
-                gid = get_g_ta_cod(url)
-                row["g_ta_cod"] = gid or ""
-
-                # OpenData
-                od = opendata_fetch(gid, session) if gid else {}
-                if od:
-                    row["od_libelle_formation"] = od.get("libelle_formation") or od.get("libelle_long") or ""
-                    row["od_libelle_etablissement"] = od.get("libelle_etablissement") or od.get("etablissement") or ""
-                    row["od_diplome"] = od.get("type_de_formation") or od.get("diplome") or ""
-                    row["od_secteur"] = od.get("secteur") or ""
-                    row["od_academie"] = od.get("academie") or od.get("nom_academie") or ""
-                    row["od_departement"] = od.get("departement") or od.get("nom_departement") or ""
-                    row["od_commune"] = od.get("commune") or ""
-                    row["od_code_postal"] = od.get("code_postal") or ""
-                    row["od_uai"] = od.get("uai") or ""
-
-                # HTML
-                try:
-                    r = session.get(url, timeout=25)
-                    row["http_status"] = r.status_code
-                    if r.status_code == 200 and "text/html" in (r.headers.get("Content-Type","").lower()):
-                        try:
-                            parsed = parse_html_fields(r.text)
-                            for k, v in parsed.items():
-                                row[k] = v
-                        except Exception as e:
-                            row["error"] = f"Parse error: {type(e).__name__}: {e}"
-                except Timeout:
-                    row["error"] = "Timeout"
-                except RequestException as e:
-                    row["error"] = f"HTTP error: {type(e).__name__}"
-
-            except Exception as e:
-                row["error"] = f"Erreur: {type(e).__name__}: {e}"
-
-            wr.writerow(row)
-
-            if i % 25 == 0:
-                print(f"[{i}/{len(urls)}] traités")
-            time.sleep(max(0.0, args.delay))
+        futures = [
+            pool.submit(scrape_url, url, gid, session, od_by_gid, host_locks, next_ok, args.delay, parse_pool, parse_cache, cache_dir, args.cache_ttl)
+            for url, gid in zip(todo, todo_gids)
+        ]
+        # Un seul consommateur (thread principal) écrit dans le CSV
+        # Lignes écrites par lots de WRITE_BATCH pour limiter les appels d'écriture
+        batch = []
+        try:
+            for i, fut in enumerate(as_completed(futures), 1):
+                batch.append(row_values(fut.result()))
+                if len(batch) >= WRITE_BATCH:
+                    wr.writerows(batch)
+                    batch.clear()
+
+                if i % 25 == 0:
+                    print(f"[{i}/{len(todo)}] traités")
+        except KeyboardInterrupt:
+            # Annule les URLs pas encore lancées : la sortie du with n'attend plus
+            # que les requêtes déjà en cours
+            pool.shutdown(wait=False, cancel_futures=True)
+            print("Interrompu : URLs restantes annulées.")
+            raise
+        finally:
+            # Le reste est écrit même en cas d'interruption, pour que --resume le retrouve
+            wr.writerows(batch)
 
     print(f"Terminé. CSV écrit: {out_path.resolve()}")
 
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""
+Contrôle de non-régression de parse_html_fields sur une fiche à plusieurs sections.
+Lancer : python -m unittest test_scrape_parcoursup_structured
+"""
+import unittest
+
+try:
+    import scrape_parcoursup_structured as sps
+except ImportError as e:  # dépendances (requirements.txt) absentes
+    raise unittest.SkipTest(f"dépendances manquantes: {e}")
+
+# Titres de niveaux mélangés et <strong> imbriqués : un parcours groupé par
+# sélecteur (h1, puis h2, ..., puis p) vide les sections.
+FICHE = """
+<html><head><title>Licence - Droit</title>
+<script>var contact = "js@exemple.fr";</script></head>
+<body>
+<h1>Licence Droit</h1>
+<p>120 places en 2024</p><p>3 500 vœux confirmés en 2024</p>
+<h3>Frais de scolarité</h3>
+<p>Par année : 170 €</p><p>Boursiers : exonération.</p>
+<h2>Langues et options</h2>
+<ul><li>Langue vivante 1 : Anglais</li></ul>
+<h4>Autre langue</h4>
+<p>Langue vivante 2 : Espagnol</p>
+<h2>Comprendre les critères d'analyse des candidatures</h2>
+<p>Résultats <strong>académiques</strong> de première.</p>
+<h2>Consulter les chiffres d'accès à la formation</h2>
+<p>1 200 candidats ont postulé</p>
+<h3>Poursuivre ses études</h3>
+<p>Master de droit.</p>
+<h2>Connaître les débouchés</h2>
+<p>Avocat, juriste.</p>
+<h2>Contacter et échanger avec l'établissement</h2>
+<p>scol@univ.fr</p>
+</body></html>
+"""
+
+
+class ParseHtmlFieldsTest(unittest.TestCase):
+    def setUp(self):
+        self.fields = sps.parse_html_fields(FICHE.encode("utf-8"))
+
+    def test_sections(self):
+        f = self.fields
+        self.assertEqual(f["criteres_analyse"], "Résultats académiques de première.")
+        self.assertEqual(f["chiffres_acces"], "1 200 candidats ont postulé")
+        self.assertEqual(f["poursuites_etudes"], "Master de droit.")
+        self.assertEqual(f["debouches"], "Avocat, juriste.")
+        self.assertEqual(f["contacter_etablissement"], "scol@univ.fr")
+
+    def test_frais_et_langues(self):
+        f = self.fields
+        self.assertEqual(f["frais_annee"], "170 €")
+        self.assertEqual(f["frais_boursiers"], "exonération")
+        self.assertEqual(f["lv1"], "Anglais")
+        self.assertEqual(f["lv2"], "")
+
+    def test_chiffres_et_emails(self):
+        f = self.fields
+        self.assertEqual(f["places"], 120)
+        self.assertEqual(f["voeux_confirmes"], 3500)
+        self.assertEqual(f["candidats_postules"], 1200)
+        self.assertEqual(f["emails_contact"], "scol@univ.fr")
+
+    def test_noscript_garde_comme_bs4(self):
+        html = "<noscript><p>contact@x.fr</p></noscript><script>js@x.fr</script><p>a@b.fr</p>"
+        f = sps.parse_html_fields(html.encode("utf-8"))
+        self.assertEqual(f["emails_contact"], "a@b.fr;contact@x.fr")
+
+    def test_selecteur_dans_l_ordre_du_document(self):
+        tree = sps.LexborHTMLParser(FICHE)
+        wanted = sps.HEADING_TAGS | sps.SECTION_BLOCK_TAGS
+        walked = [n.tag for n in tree.root.traverse() if n.tag in wanted]
+        self.assertEqual([n.tag for n in tree.css(sps.SECTION_NODES_SEL)], walked)
+
+
+if __name__ == "__main__":
+    unittest.main()